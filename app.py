@@ -1,22 +1,38 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-from pipeline import rag
+from waitress import serve
+from pipeline import (
+    OLLAMA_MODEL, OPENAI_MODEL, get_data, get_embeddings, get_search_backend, rag, rag_stream, warmup
+)
+import atexit
+import json
 import logging
+import os
+import queue
 import re
 from datetime import datetime, timezone
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
 import traceback
-from typing import Dict, Any, Tuple
-
-# Configure logging
+from typing import Dict, Any, Iterator, Tuple
+
+# Configure logging: request threads only put records on a queue, and a
+# background listener thread does the file and console writes.
+# force=True replaces the console-only handler pipeline installs on import.
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(
+    log_queue,
+    logging.FileHandler('rag_app.log'),
+    logging.StreamHandler()
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('rag_app.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(log_queue)],
+    force=True
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
@@ -29,6 +45,25 @@ class Config:
     DEFAULT_TOP_K = 5
     MAX_TOP_K = 20
     REQUEST_TIMEOUT = 60  # seconds
+    HOST = '127.0.0.1'
+    PORT = 8000
+    # Concurrent requests handled by the WSGI server; most of a request is
+    # spent waiting on the LLM, so size the pool above the core count
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", (os.cpu_count() or 4) * 2))
+    WARMUP_LLM = True  # preload the Ollama model before accepting requests
+
+
+# Markdown wrappers the LLM sometimes puts around its HTML: leading ```html / ```
+# fences and a bare "html" prefix, and a trailing ``` fence. Whole answers are
+# cleaned in a single pass with the combined pattern, streams with the two halves
+_HTML_PREFIX_RE = re.compile(r'\A(?:```html\s*)?(?:```\s*)?(?:\s*[`\'"]?html[`\'"]?\s*)?', flags=re.IGNORECASE)
+_HTML_SUFFIX_RE = re.compile(r'\n?```$', flags=re.IGNORECASE)
+_HTML_WRAPPER_RE = re.compile(f"{_HTML_PREFIX_RE.pattern}|{_HTML_SUFFIX_RE.pattern}", flags=re.IGNORECASE)
+
+# Streamed characters held back until they can no longer be part of a wrapper:
+# the start of the answer until the prefix is known, its end until the stream ends
+_STREAM_HEAD_HOLD = 32
+_STREAM_TAIL_HOLD = 8
 
 
 # ===== MIDDLEWARE / DECORATORS =====
@@ -36,20 +71,21 @@ def log_request(f):
     """Decorator to log all requests and responses."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Log request
-        request_data = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'method': request.method,
-            'path': request.path,
-            'remote_addr': request.remote_addr,
-            'data': request.get_json(silent=True)
-        }
-        logger.info(f"Incoming request: {request_data}")
+        # Log request (only built when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            request_data = {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'method': request.method,
+                'path': request.path,
+                'remote_addr': request.remote_addr,
+                'data': request.get_json(silent=True)
+            }
+            logger.debug(f"Incoming request: {request_data}")
         
         try:
             # Execute the route function
             response = f(*args, **kwargs)
-            logger.info(f"Request successful: {request.path}")
+            logger.debug(f"Request successful: {request.path}")
             return response
         except Exception as e:
             logger.error(f"Request failed: {request.path} - {str(e)}")
@@ -136,6 +172,35 @@ def validate_top_k(top_k: Any) -> Tuple[bool, str, int]:
     return True, "", k
 
 
+def parse_generate_params(data: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Extract and validate the parameters shared by the generate endpoints.
+    
+    Returns:
+        Tuple of (is_valid, error_message, params) where params holds
+        query, use_openai and top_k
+    """
+    # Extract and validate query
+    query = data.get("query", "").strip()
+    is_valid, error_msg = validate_query(query)
+    if not is_valid:
+        return False, error_msg, {}
+    
+    # Extract and validate use_openai
+    use_openai = data.get("use_openai", False)
+    if not isinstance(use_openai, bool):
+        return False, "use_openai must be a boolean", {}
+    
+    # Extract and validate top_k
+    top_k = data.get("top_k", Config.DEFAULT_TOP_K)
+    is_valid, error_msg, top_k = validate_top_k(top_k)
+    if not is_valid:
+        logger.warning(f"Invalid top_k value, using default: {error_msg}")
+        # Don't return error, just use default
+    
+    return True, "", {"query": query, "use_openai": use_openai, "top_k": top_k}
+
+
 def clean_html_response(html_string: str) -> str:
     """
     Clean HTML response from LLM by removing markdown code blocks and prefixes.
@@ -146,13 +211,9 @@ def clean_html_response(html_string: str) -> str:
     Returns:
         Cleaned HTML string
     """
-    # Remove markdown code blocks (```html ... ``` or ```...```)
-    html_string = re.sub(r'^```html\s*\n?', '', html_string, flags=re.IGNORECASE)
-    html_string = re.sub(r'^```\s*\n?', '', html_string)
-    html_string = re.sub(r'\n?```$', '', html_string)
-    
-    # Remove standalone "html" at the start (case insensitive)
-    html_string = re.sub(r'^\s*[`\'"]?html[`\'"]?\s*\n?', '', html_string, flags=re.IGNORECASE)
+    # Remove markdown code blocks (```html ... ``` or ```...```) and a
+    # standalone "html" prefix in one pass
+    html_string = _HTML_WRAPPER_RE.sub('', html_string)
     
     # Remove any leading/trailing whitespace
     html_string = html_string.strip()
@@ -160,6 +221,36 @@ def clean_html_response(html_string: str) -> str:
     return html_string
 
 
+def clean_html_stream(chunks: Iterator[str]) -> Iterator[str]:
+    """
+    Streaming counterpart of clean_html_response(), removing the same wrappers
+    from an answer arriving in chunks.
+    
+    Args:
+        chunks: Raw text chunks from the LLM
+    
+    Yields:
+        Cleaned chunks; their concatenation equals clean_html_response() of the whole answer
+    """
+    pending = ""
+    prefix_removed = False
+    for chunk in chunks:
+        pending += chunk
+        if not prefix_removed:
+            if len(pending) < _STREAM_HEAD_HOLD:
+                continue
+            pending = _HTML_PREFIX_RE.sub('', pending, count=1).lstrip()
+            prefix_removed = True
+        if len(pending) > _STREAM_TAIL_HOLD:
+            yield pending[:-_STREAM_TAIL_HOLD]
+            pending = pending[-_STREAM_TAIL_HOLD:]
+    
+    # Short answers never left the head buffer and are cleaned whole
+    tail = _HTML_SUFFIX_RE.sub('', pending).rstrip() if prefix_removed else clean_html_response(pending)
+    if tail:
+        yield tail
+
+
 def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Tuple[Dict, int]:
     """Create standardized success response."""
     response = {
@@ -220,23 +311,10 @@ def generate():
     try:
         data = request.get_json()
         
-        # Extract and validate query
-        query = data.get("query", "").strip()
-        is_valid, error_msg = validate_query(query)
+        is_valid, error_msg, params = parse_generate_params(data)
         if not is_valid:
             return create_error_response(error_msg, 400)
-        
-        # Extract and validate use_openai
-        use_openai = data.get("use_openai", False)
-        if not isinstance(use_openai, bool):
-            return create_error_response("use_openai must be a boolean", 400)
-        
-        # Extract and validate top_k
-        top_k = data.get("top_k", Config.DEFAULT_TOP_K)
-        is_valid, error_msg, top_k = validate_top_k(top_k)
-        if not is_valid:
-            logger.warning(f"Invalid top_k value, using default: {error_msg}")
-            # Don't return error, just use default
+        query, use_openai, top_k = params["query"], params["use_openai"], params["top_k"]
         
         # Log the request
         logger.info(f"Processing query: '{query[:100]}...' (use_openai={use_openai}, top_k={top_k})")
@@ -280,6 +358,51 @@ def generate():
         )
 
 
+@app.route('/generate/stream', methods=['POST'])
+@log_request
+@validate_json(['query'])
+def generate_stream():
+    """
+    Stream the RAG answer as Server-Sent Events while the LLM generates it.
+    
+    Request Body:
+        Same as /generate/
+    
+    Returns:
+        200: text/event-stream of `data: {"chunk": str}` events, cleaned of
+             markdown wrappers like /generate/, ended by `event: done`, or by
+             `event: error` on failure
+        400: Bad request (validation error)
+    """
+    data = request.get_json()
+    
+    is_valid, error_msg, params = parse_generate_params(data)
+    if not is_valid:
+        return create_error_response(error_msg, 400)
+    
+    logger.info(
+        f"Streaming query: '{params['query'][:100]}...' "
+        f"(use_openai={params['use_openai']}, top_k={params['top_k']})"
+    )
+    
+    def event_stream():
+        try:
+            answer_chunks = rag_stream(params["query"], use_openai=params["use_openai"], k=params["top_k"])
+            for chunk in clean_html_stream(answer_chunks):
+                yield f"data: {json.dumps({'chunk': chunk})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming failed: {e}")
+            error = {"error": "Failed to generate answer", "details": str(e)}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+    
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/query', methods=['POST'])
 @log_request
 @validate_json(['query'])
@@ -298,14 +421,15 @@ def stats():
     Returns:
         200: Statistics about the RAG system
     """
-    from pipeline import DF, EVENT_EMBEDDINGS, INDEX
+    embeddings = get_embeddings()
     
     return create_success_response({
-        "total_documents": len(DF),
-        "embedding_dimensions": EVENT_EMBEDDINGS.shape[1],
-        "index_size": INDEX.ntotal,
+        "total_documents": len(get_data()),
+        "embedding_dimensions": embeddings.shape[1],
+        "index_size": len(embeddings),
+        "search_backend": get_search_backend(),
         "model": "all-MiniLM-L6-v2",
-        "backends": ["ollama (phi3:mini)", "openai (gpt-4-turbo)"]
+        "backends": [f"ollama ({OLLAMA_MODEL})", f"openai ({OPENAI_MODEL})"]
     })
 
 
@@ -356,12 +480,19 @@ if __name__ == '__main__':
     logger.info(f"Max query length: {Config.MAX_QUERY_LENGTH}")
     logger.info(f"Default top_k: {Config.DEFAULT_TOP_K}")
     logger.info(f"Max top_k: {Config.MAX_TOP_K}")
+    logger.info(f"Server threads: {Config.SERVER_THREADS}")
     logger.info("="*60)
     
-    # Run the Flask application
-    app.run(
-        host='127.0.0.1',
-        port=8000,
-        debug=True,  # Set to False in production
-        threaded=True  # Handle multiple requests concurrently
+    # Pay one-time initialisation costs before the first user request does
+    warmup(load_llm=Config.WARMUP_LLM)
+    
+    # Serve with waitress instead of the Werkzeug dev server: requests are
+    # handled by a fixed worker pool, and there is no debug reloader spawning
+    # a second process that loads the model and index all over again.
+    # For local development use `flask --app app run --debug`.
+    serve(
+        app,
+        host=Config.HOST,
+        port=Config.PORT,
+        threads=Config.SERVER_THREADS
     )
\ No newline at end of file
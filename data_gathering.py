@@ -1,6 +1,11 @@
 from SPARQLWrapper import SPARQLWrapper, JSON
 import pandas as pd
 
+try:
+    import orjson as json_parser  # SIMD-accelerated JSON parsing
+except ImportError:
+    import json as json_parser
+
 # Define the endpoint
 sparql = SPARQLWrapper("https://dbpedia.org/sparql")
 
@@ -24,7 +29,8 @@ sparql.setQuery(query)
 
 # Set return format
 sparql.setReturnFormat(JSON)
-results = sparql.query().convert()
+# Parse the raw response bytes directly instead of letting convert() use the stdlib json module
+results = json_parser.loads(sparql.query().response.read())
 
 # Print results
 # for result in results["results"]["bindings"]:
@@ -40,6 +46,6 @@ events_with_abstracts = [
     for result in results["results"]["bindings"]
 ]
 
-# Save to CSV for offline use
+# Save to Parquet for offline use (typed, compressed and fast to load)
 df = pd.DataFrame(events_with_abstracts)
-df.to_csv("historical_events_with_abstracts.csv", index=False)
+df.to_parquet("historical_events.parquet", compression='zstd', index=False)
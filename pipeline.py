@@ -1,16 +1,37 @@
+import os
+
+# Tokenizer worker threads would compete with the server's request threads
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
 from sentence_transformers import SentenceTransformer
+import torch
 import faiss
 import numpy as np
 import pandas as pd
-from ollama import chat
-from ollama import ChatResponse
-import os
+import pyarrow.parquet as pq
+import diskcache
+import httpx
+from ollama import Client as OllamaClient
 from openai import OpenAI
+import hashlib
+import io
 import logging
-from typing import Optional
-import os
+import platform
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    import simsimd
+except ImportError:  # Optional SIMD distance kernels, FAISS is used without them
+    simsimd = None
+
 load_dotenv()
 
 # Configure logging
@@ -20,58 +41,626 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# ===== LLM CLIENTS =====
+# Both clients are created once and reused, so every request goes over an
+# already-open keep-alive connection instead of a fresh TCP/TLS handshake
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# Models answering through each backend
+OLLAMA_MODEL = "phi3:mini"
+OPENAI_MODEL = "gpt-4-turbo"
+# Comma-separated Ollama servers (e.g. one per GPU); requests are spread over them
+OLLAMA_URLS = [url.strip() for url in os.getenv("OLLAMA_URLS", OLLAMA_HOST).split(",") if url.strip()]
+# An Ollama server generates one answer at a time, so more concurrent requests
+# per endpoint would only queue there behind each other
+OLLAMA_ENDPOINT_CONCURRENCY = 1
+# Consecutive failures after which an endpoint is taken out of rotation, and for how long
+OLLAMA_MAX_FAILURES = 3
+OLLAMA_QUARANTINE_SECONDS = 30.0
+
+
+class OllamaEndpoint:
+    """One Ollama server: its client, its request slots and its circuit-breaker state."""
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.client = OllamaClient(host=url)
+        self.slots = threading.Semaphore(OLLAMA_ENDPOINT_CONCURRENCY)
+        self.failures = 0
+        self.quarantined_until = 0.0
+    
+    def is_quarantined(self) -> bool:
+        return time.monotonic() < self.quarantined_until
+
+
+class OllamaPool:
+    """
+    Round-robin pool of Ollama endpoints.
+    
+    Each request is sent to the next endpoint with a free slot, waiting for
+    one when all are busy, so concurrent users are spread over the servers
+    instead of queueing on one. Endpoints failing OLLAMA_MAX_FAILURES times
+    in a row are skipped for OLLAMA_QUARANTINE_SECONDS, then tried again. A
+    sole endpoint is never skipped, and when all of them are, requests go to
+    the one whose quarantine ends first rather than failing outright.
+    """
+    
+    def __init__(self, urls: List[str]):
+        self.endpoints = [OllamaEndpoint(url) for url in urls]
+        self._next = 0
+        self._released = threading.Condition()
+    
+    def _try_acquire(self) -> Optional[OllamaEndpoint]:
+        """Take a slot on the next healthy endpoint with one free, if any (caller holds _released)."""
+        if all(endpoint.is_quarantined() for endpoint in self.endpoints):
+            endpoint = min(self.endpoints, key=lambda endpoint: endpoint.quarantined_until)
+            return endpoint if endpoint.slots.acquire(blocking=False) else None
+        
+        for offset in range(len(self.endpoints)):
+            position = (self._next + offset) % len(self.endpoints)
+            endpoint = self.endpoints[position]
+            if not endpoint.is_quarantined() and endpoint.slots.acquire(blocking=False):
+                self._next = position + 1
+                return endpoint
+        return None
+    
+    def _release(self, endpoint: OllamaEndpoint, failed: bool):
+        """Free the endpoint's slot and update its circuit breaker."""
+        with self._released:
+            if not failed:
+                endpoint.failures = 0
+            else:
+                endpoint.failures += 1
+                if endpoint.failures >= OLLAMA_MAX_FAILURES and len(self.endpoints) > 1:
+                    endpoint.failures = 0
+                    endpoint.quarantined_until = time.monotonic() + OLLAMA_QUARANTINE_SECONDS
+                    logger.warning(f"Ollama endpoint {endpoint.url} failing, skipped for {OLLAMA_QUARANTINE_SECONDS:.0f}s")
+            endpoint.slots.release()
+            self._released.notify()
+    
+    @contextmanager
+    def client(self) -> Iterator[OllamaClient]:
+        """
+        Hold a slot on an endpoint for the duration of the block.
+        
+        Yields:
+            Client of the chosen endpoint
+        """
+        with self._released:
+            endpoint = self._try_acquire()
+            while endpoint is None:
+                # Bounded wait, so quarantines expiring meanwhile are noticed
+                self._released.wait(timeout=1.0)
+                endpoint = self._try_acquire()
+        
+        failed = False
+        try:
+            yield endpoint.client
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(endpoint, failed)
+
+
+OLLAMA_POOL = OllamaPool(OLLAMA_URLS)
+
+
+def create_openai_client(api_key: str) -> OpenAI:
+    """Create an OpenAI client backed by a pooled keep-alive HTTP connection."""
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60)
+    )
+    return OpenAI(api_key=api_key, http_client=http_client)
+
+
+# Initialize OpenAI client (lazily in generate_answer if the key is not set yet)
+client = create_openai_client(os.getenv("OPENAI_API_KEY")) if os.getenv("OPENAI_API_KEY") else None
+
+# Data and on-disk cache locations
+DATA_PATH = "./historical_events.parquet"
+LEGACY_CSV_PATH = "./historical_events_with_abstracts.csv"
+CACHE_DIR = "./cache"
+
+# Embedding model runs on the GPU when one is available
+MODEL_NAME = 'all-MiniLM-L6-v2'
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+ENCODE_BATCH_SIZE = 256 if DEVICE == "cuda" else 64
+# Corpus texts encoded per encode() call, bounding the tokenized and
+# intermediate tensors held at once while building the embeddings
+ENCODE_CHUNK_SIZE = 50_000
+
+# Dynamically int8-quantized ONNX exports of the same model, shipped in its Hub
+# repository, used to encode queries on CPU. Each one is tuned for an instruction
+# set; QUERY_ONNX_FILE overrides the automatic choice
+QUERY_ONNX_FILES = {
+    "avx512_vnni": "onnx/model_qint8_avx512_vnni.onnx",
+    "avx512": "onnx/model_qint8_avx512.onnx",
+    "avx2": "onnx/model_quint8_avx2.onnx",
+    "arm64": "onnx/model_qint8_arm64.onnx",
+}
 
-# ===== LOAD MODEL AND DATA AT MODULE LEVEL =====
-logger.info("Loading sentence transformer model...")
-MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+# Search backend: "exact" (SimSIMD/BLAS scan of the embeddings, no FAISS index) or a
+# FAISS index kind: "flat" (exact scan), "hnsw" (graph over float32 vectors),
+# "hnsw_sq" (graph over 8-bit codes) or "ivfpq". Unset, it is chosen from the corpus
+# size (see index_kind_for); when set, it is used whatever the corpus size
+FAISS_INDEX_KINDS = ("flat", "hnsw", "hnsw_sq", "ivfpq")
+INDEX_KINDS = ("exact",) + FAISS_INDEX_KINDS
+INDEX_KIND = os.getenv("INDEX_KIND") or None
+# Checked once here, so a typo fails at startup instead of on every request
+if INDEX_KIND is not None and INDEX_KIND not in INDEX_KINDS:
+    raise ValueError(f"INDEX_KIND must be one of {', '.join(INDEX_KINDS)}, got '{INDEX_KIND}'")
+
+# HNSW graph parameters: neighbours per node, build-time and query-time beam width
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# From this size on, the HNSW graph links dominate memory and IVFPQ is used instead:
+# k-means partitions the corpus into nlist cells, only nprobe of them are scanned per
+# query, and vectors are stored as 16-byte product-quantizer codes (384 dims / 16 = 24 each)
+IVFPQ_MIN_DOCS = 100_000
+IVFPQ_M = 16
+IVFPQ_NBITS = 8
+IVFPQ_NPROBE = 8
+
+# Corpora up to this size are searched exactly (SimSIMD or BLAS) and get no FAISS
+# index, unless INDEX_KIND is set
+EXACT_SEARCH_MAX_DOCS = 20_000
+
+# OpenMP threads per FAISS search. Each request already runs on its own server
+# thread, so parallelising inside a search would oversubscribe the cores
+FAISS_SEARCH_THREADS = 1
+# Same reasoning for the intra-op pool (torch, or onnxruntime for the quantized
+# encoder) used by per-request query encoding
+QUERY_ENCODE_THREADS = 1
+
+# Bounded caches for repeated queries (UI retries, popular questions)
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+ANSWER_CACHE_SIZE = 1024
+# Answers also persist on disk so they survive restarts and are shared by workers
+ANSWER_DISK_CACHE_DIR = "./cache/answers"
+ANSWER_DISK_CACHE_SIZE_LIMIT = 256 * 1024 * 1024  # bytes
+ANSWER_DISK_CACHE_EXPIRE_SECONDS = 7 * 24 * 3600
+# Longest a request waits for an identical in-flight generation before giving up
+IN_FLIGHT_WAIT_SECONDS = 300
+
+
+# ===== INDEX CONSTRUCTION =====
+def write_atomically(path: str, write: Callable[[str], None]):
+    """
+    Write a file through a temporary sibling and rename it into place, so a
+    concurrently starting worker never reads a half-written cache file.
+    
+    Args:
+        path: Final file path
+        write: Function writing the content to the path it is given
+    """
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
 
-logger.info("Loading historical events data...")
-DF = pd.read_csv("./historical_events_with_abstracts.csv")
 
-# Combine label + abstract for richer embeddings
-logger.info("Creating combined text embeddings...")
-DF['combined_text'] = DF['label'] + " " + DF['abstract']
+def index_kind_for(n_docs: int) -> str:
+    """
+    Return the search backend used for a corpus of n_docs vectors.
+    
+    INDEX_KIND wins when set. Otherwise corpora of up to EXACT_SEARCH_MAX_DOCS
+    are scanned exactly, medium ones get an HNSW graph over 8-bit codes and
+    corpora of IVFPQ_MIN_DOCS or more get IVFPQ.
+    """
+    if INDEX_KIND:
+        return INDEX_KIND
+    if n_docs <= EXACT_SEARCH_MAX_DOCS:
+        return "exact"
+    return "ivfpq" if n_docs >= IVFPQ_MIN_DOCS else "hnsw_sq"
+
+
+def build_index(embeddings: np.ndarray, kind: Optional[str] = None) -> faiss.Index:
+    """
+    Build a nearest-neighbour index over the corpus embeddings.
+    
+    - flat: exact inner-product scan over every vector, O(N) per query
+    - hnsw: HNSW graph over the float32 vectors; search visits O(log N) nodes
+      at near-exact recall
+    - hnsw_sq: the same graph over 8-bit scalar codes, a quarter of the
+      float32 footprint for a small recall loss
+    - ivfpq: scans only nprobe of ~4*sqrt(N) cells over 16-byte PQ codes
+    
+    Embeddings are expected to be L2-normalized, so inner product ranks
+    exactly like cosine similarity.
+    
+    Args:
+        embeddings: float32 array of shape (N, d)
+        kind: One of FAISS_INDEX_KINDS (default: index_kind_for(N), with "flat"
+            standing in for "exact" on small corpora)
+    
+    Returns:
+        Trained and populated FAISS index
+    
+    Raises:
+        ValueError: If kind is not a FAISS index kind (e.g. "exact")
+    """
+    n_docs, d = embeddings.shape
+    if kind is None:
+        kind = index_kind_for(n_docs)
+        if kind == "exact":
+            # Exact search needs no index, but a caller asking for one gets the exact FAISS equivalent
+            kind = "flat"
+    
+    if kind == "flat":
+        index = faiss.IndexFlatIP(d)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind == "hnsw_sq":
+        index = faiss.IndexHNSWSQ(d, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind == "ivfpq":
+        nlist = int(4 * np.sqrt(n_docs))
+        # The coarse quantizer must use the same metric as the index
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFPQ(
+            quantizer, d, nlist, IVFPQ_M, IVFPQ_NBITS, faiss.METRIC_INNER_PRODUCT
+        )
+    else:
+        raise ValueError(f"No FAISS index for kind '{kind}', expected one of {', '.join(FAISS_INDEX_KINDS)}")
+    
+    # Quantizers (k-means/PQ codebooks, scalar ranges) are learned before encoding;
+    # a no-op for the flat kinds
+    index.train(embeddings)
+    index.add(embeddings)
+    return index
+
+
+def read_index(path: str) -> faiss.Index:
+    """
+    Read a FAISS index from disk, memory-mapping what FAISS supports
+    (IVF inverted lists), so those pages are loaded on demand and shared
+    between processes instead of copied into each one's heap.
+    """
+    return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+
+
+def encode_corpus(model: SentenceTransformer, texts: np.ndarray) -> np.ndarray:
+    """
+    Encode the corpus into unit-norm float32 embeddings, chunk by chunk.
+    
+    Each chunk is written straight into one preallocated matrix, so peak
+    memory is the result plus a single chunk rather than the whole corpus'
+    intermediate outputs.
+    
+    Args:
+        model: Sentence transformer used for the corpus
+        texts: Object array of N document texts
+    
+    Returns:
+        C-contiguous float32 array of shape (N, d)
+    """
+    embeddings = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    for start in range(0, len(texts), ENCODE_CHUNK_SIZE):
+        chunk = texts[start:start + ENCODE_CHUNK_SIZE]
+        # Unit vectors, so cosine similarity is a plain inner product; fp16
+        # outputs of the half-precision GPU model are cast on assignment
+        embeddings[start:start + len(chunk)] = model.encode(
+            chunk,
+            batch_size=ENCODE_BATCH_SIZE,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+    return embeddings
+
+
+def configure_search(index: faiss.Index):
+    """Apply the query-time parameters of index, whether it was built or loaded."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = IVFPQ_NPROBE
+
+
+def select_query_onnx_file() -> str:
+    """
+    Pick the quantized ONNX export matching this CPU.
+    
+    VNNI CPUs get the export whose int8 dot products map onto vpdpbusd; plain
+    AVX2 CPUs need the uint8 one, as signed int8 weights saturate there.
+    
+    Returns:
+        Path of the ONNX file inside the model's Hub repository
+    """
+    if os.getenv("QUERY_ONNX_FILE"):
+        return os.getenv("QUERY_ONNX_FILE")
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return QUERY_ONNX_FILES["arm64"]
+    
+    cpu_flags = set()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("flags"):
+                    cpu_flags = set(line.split(":", 1)[1].split())
+                    break
+    except OSError:
+        pass  # No cpuinfo (macOS, Windows): assume the AVX2 baseline
+    
+    if "avx512_vnni" in cpu_flags:
+        return QUERY_ONNX_FILES["avx512_vnni"]
+    if "avx512bw" in cpu_flags:
+        return QUERY_ONNX_FILES["avx512"]
+    return QUERY_ONNX_FILES["avx2"]
+
 
-# Encode and convert to float32 (required by FAISS)
-event_embeddings = MODEL.encode(DF['combined_text'].tolist(), show_progress_bar=True)
-EVENT_EMBEDDINGS = np.array(event_embeddings, dtype='float32')
+# ===== LAZY-LOADED MODEL, DATA AND INDEX =====
+# Importing this module is cheap: the model, the corpus and the index are loaded
+# on first use, exactly once even when several request threads ask together.
+# Each global is assigned last, after everything it depends on, so the
+# unlocked "is it loaded" check never sees a half-initialised resource
+_LOAD_LOCK = threading.RLock()
 
-# Verify dtype
-assert EVENT_EMBEDDINGS.dtype == np.float32, "FAISS requires float32 embeddings"
+MODEL: Optional[SentenceTransformer] = None
+QUERY_MODEL: Optional[SentenceTransformer] = None
 
-# Build FAISS index
-logger.info("Building FAISS index...")
-INDEX = faiss.IndexFlatL2(EVENT_EMBEDDINGS.shape[1])
-INDEX.add(EVENT_EMBEDDINGS)
+DF: Optional[pd.DataFrame] = None
+EVENTS: Optional[np.ndarray] = None
+LABELS: Optional[np.ndarray] = None
+DATES: Optional[np.ndarray] = None
+ABSTRACTS: Optional[np.ndarray] = None
+COMBINED_LOWER: Optional[np.ndarray] = None
+CACHE_KEY: Optional[str] = None
+EMBEDDINGS_PATH: Optional[str] = None
+INDEX_PATH: Optional[str] = None
 
-logger.info(f"✓ Loaded {len(DF)} events. Index ready with {EVENT_EMBEDDINGS.shape[1]} dimensions.")
+EVENT_EMBEDDINGS: Optional[np.ndarray] = None
+INDEX: Optional[faiss.Index] = None
+GPU_RESOURCES = None
+GPU_INDEX = None
+# "gpu", "exact" or "faiss", chosen once when the index is loaded
+SEARCH_BACKEND: Optional[str] = None
+
+
+def get_model() -> SentenceTransformer:
+    """
+    Return the full-precision embedding model, loading it on first call.
+    
+    Only needed to encode the corpus when no cached embeddings exist, and to
+    encode queries on GPU or when the quantized encoder is unavailable.
+    """
+    global MODEL
+    if MODEL is not None:
+        return MODEL
+    
+    with _LOAD_LOCK:
+        if MODEL is not None:
+            return MODEL
+        
+        logger.info("Loading sentence transformer model...")
+        model = SentenceTransformer(MODEL_NAME, device=DEVICE)
+        if DEVICE == "cuda":
+            # FP16 weights halve memory traffic and use tensor cores; outputs are cast back to float32
+            model.half()
+        
+        MODEL = model
+        return MODEL
+
+
+def get_query_model() -> SentenceTransformer:
+    """Return the model used to encode queries, loading it on first call."""
+    global QUERY_MODEL
+    if QUERY_MODEL is not None:
+        return QUERY_MODEL
+    
+    with _LOAD_LOCK:
+        if QUERY_MODEL is not None:
+            return QUERY_MODEL
+        
+        # Per-request query encoding is the main CPU cost once the index is warm; int8
+        # matmuls run 2-4x faster there. The corpus keeps the full-precision model,
+        # which is not loaded at all when the embeddings come from the cache.
+        query_model = None
+        if DEVICE == "cpu":
+            query_onnx_file = select_query_onnx_file()
+            try:
+                import onnxruntime
+                
+                # onnxruntime otherwise starts one intra-op thread per core in every session
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = QUERY_ENCODE_THREADS
+                session_options.inter_op_num_threads = 1
+                query_model = SentenceTransformer(
+                    MODEL_NAME,
+                    backend="onnx",
+                    model_kwargs={"file_name": query_onnx_file, "session_options": session_options}
+                )
+                logger.info(f"✓ Using quantized ONNX query encoder ({query_onnx_file})")
+            except Exception as e:
+                logger.warning(f"Quantized ONNX query encoder unavailable, using the PyTorch model: {e}")
+        
+        QUERY_MODEL = query_model or get_model()
+        return QUERY_MODEL
+
+
+def get_data() -> pd.DataFrame:
+    """Return the historical events DataFrame, loading it on first call."""
+    global DF, EVENTS, LABELS, DATES, ABSTRACTS, COMBINED_LOWER, CACHE_KEY, EMBEDDINGS_PATH, INDEX_PATH
+    if DF is not None:
+        return DF
+    
+    with _LOAD_LOCK:
+        if DF is not None:
+            return DF
+        
+        logger.info("Loading historical events data...")
+        if not os.path.exists(DATA_PATH) and os.path.exists(LEGACY_CSV_PATH):
+            # One-time conversion of datasets gathered before the switch to Parquet
+            logger.info(f"Converting {LEGACY_CSV_PATH} to {DATA_PATH}...")
+            legacy_df = pd.read_csv(LEGACY_CSV_PATH)
+            write_atomically(DATA_PATH, lambda path: legacy_df.to_parquet(path, compression='zstd', index=False))
+        df = pq.read_table(DATA_PATH, memory_map=True).to_pandas()
+        
+        # Combine label + abstract for richer embeddings
+        df['combined_text'] = df['label'] + " " + df['abstract']
+        
+        # Plain object arrays of the fields used to build the LLM context; fancy
+        # indexing these is far cheaper per query than slicing a DataFrame with iloc
+        EVENTS = df['event'].astype(str).to_numpy(dtype=object)
+        LABELS = df['label'].astype(str).to_numpy(dtype=object)
+        DATES = df['date'].astype(str).to_numpy(dtype=object)
+        ABSTRACTS = df['abstract'].astype(str).to_numpy(dtype=object)
+        # Lowercased once for keyword matching in the retrieval evaluation
+        COMBINED_LOWER = df['combined_text'].astype(str).str.lower().to_numpy(dtype=object)
+        
+        # Cache files are keyed on the corpus content and the model, plus the index kind
+        # for the index, so changing any of them builds a fresh cache instead of
+        # loading a stale one
+        cache_hash = hashlib.sha1(pd.util.hash_pandas_object(df['combined_text'], index=False).values.tobytes())
+        cache_hash.update(MODEL_NAME.encode())
+        EMBEDDINGS_PATH = os.path.join(CACHE_DIR, f"{cache_hash.hexdigest()}.npy")
+        cache_hash.update(f"|{index_kind_for(len(df))}".encode())
+        CACHE_KEY = cache_hash.hexdigest()
+        INDEX_PATH = os.path.join(CACHE_DIR, f"{CACHE_KEY}.faiss")
+        
+        DF = df
+        return DF
+
+
+def get_index() -> Optional[faiss.Index]:
+    """
+    Return the FAISS index over the corpus, loading it on first call, or None
+    when queries are served by exact search over the embeddings.
+    
+    The cached embeddings and index are reused when present; otherwise the
+    corpus is encoded (loading the model) and the index built and cached.
+    The search backend is chosen here once, not per query.
+    """
+    global EVENT_EMBEDDINGS, INDEX, GPU_RESOURCES, GPU_INDEX, SEARCH_BACKEND
+    if SEARCH_BACKEND is not None:
+        return INDEX
+    
+    with _LOAD_LOCK:
+        if SEARCH_BACKEND is not None:
+            return INDEX
+        
+        df = get_data()
+        # Exact search scans the embeddings directly, so no FAISS index is built or cached
+        use_faiss_index = index_kind_for(len(df)) != "exact"
+        
+        # Reuse the cached embeddings and index, so a restart does not have to
+        # re-encode the whole corpus
+        if os.path.exists(EMBEDDINGS_PATH):
+            logger.info(f"Loading cached embeddings from {EMBEDDINGS_PATH}...")
+            # Memory-mapped: pages are read on demand and shared by every worker process
+            EVENT_EMBEDDINGS = np.load(EMBEDDINGS_PATH, mmap_mode='r')
+        else:
+            logger.info("Creating combined text embeddings...")
+            # The column's object array is passed as is, without a list copy of N strings
+            embeddings = encode_corpus(get_model(), df['combined_text'].to_numpy(dtype=object))
+            
+            # Written once at build time only; the serving path never touches these files
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            write_atomically(EMBEDDINGS_PATH, lambda path: np.save(path, embeddings))
+            logger.info(f"✓ Embeddings cached to {EMBEDDINGS_PATH}")
+            EVENT_EMBEDDINGS = embeddings
+        
+        # Verify dtype and layout
+        assert EVENT_EMBEDDINGS.dtype == np.float32, "FAISS requires float32 embeddings"
+        assert EVENT_EMBEDDINGS.flags['C_CONTIGUOUS'], "FAISS requires C-contiguous embeddings"
+        
+        index = None
+        if use_faiss_index:
+            if os.path.exists(INDEX_PATH):
+                logger.info(f"Loading cached FAISS index ({CACHE_KEY[:12]})...")
+                index = read_index(INDEX_PATH)
+            else:
+                logger.info("Building FAISS index...")
+                index = build_index(EVENT_EMBEDDINGS)
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                write_atomically(INDEX_PATH, lambda path: faiss.write_index(index, path))
+                logger.info(f"✓ FAISS index cached to {INDEX_PATH}")
+            configure_search(index)
+        
+        # Index building above is parallel; from here on only single-query searches run
+        faiss.omp_set_num_threads(FAISS_SEARCH_THREADS)
+        torch.set_num_threads(QUERY_ENCODE_THREADS)
+        
+        # With a GPU, search there. IVFPQ moves over as is; HNSW graphs have no GPU
+        # implementation, so the other kinds get an exact flat index on the GPU
+        # instead, which still beats the CPU graph
+        backend = "faiss" if use_faiss_index else "exact"
+        if faiss.get_num_gpus() > 0:
+            logger.info("Copying the index to the GPU...")
+            GPU_RESOURCES = faiss.StandardGpuResources()
+            cloner_options = faiss.GpuClonerOptions()
+            # float16 vectors / PQ lookup tables halve GPU memory and bandwidth
+            cloner_options.useFloat16 = True
+            if isinstance(index, faiss.IndexIVF):
+                gpu_source_index = index
+            else:
+                gpu_source_index = faiss.IndexFlatIP(EVENT_EMBEDDINGS.shape[1])
+                gpu_source_index.add(EVENT_EMBEDDINGS)
+            GPU_INDEX = faiss.index_cpu_to_gpu(GPU_RESOURCES, 0, gpu_source_index, cloner_options)
+            backend = "gpu"
+        
+        logger.info(
+            f"✓ Loaded {len(df)} events. Searching {EVENT_EMBEDDINGS.shape[1]}-dimensional "
+            f"embeddings with the {backend} backend."
+        )
+        
+        INDEX = index
+        SEARCH_BACKEND = backend
+        return INDEX
+
+
+def get_embeddings() -> np.ndarray:
+    """Return the (N, d) corpus embeddings, loading them on first call."""
+    get_index()
+    return EVENT_EMBEDDINGS
+
+
+def get_search_backend() -> str:
+    """Return the search backend serving queries: "gpu", "exact" or "faiss"."""
+    get_index()
+    return SEARCH_BACKEND
+
+
+def load_resources():
+    """Load everything a query needs (query encoder, data, index); a no-op once loaded."""
+    get_query_model()
+    get_index()
 
 
 # ===== HELPER FUNCTIONS =====
-def format_retrieved_documents(events_df: pd.DataFrame) -> str:
+_DOCUMENT_TEMPLATE = (
+    "\nDocument {rank}:\n"
+    "- **Event:** {event}\n"
+    "- **Label:** {label}\n"
+    "- **Date:** {date}\n"
+    "- **Abstract:** {abstract}\n\n"
+)
+
+
+def format_retrieved_documents(doc_indices: np.ndarray) -> str:
     """
-    Format the retrieved events DataFrame into a string suitable for context.
+    Format the retrieved events into a string suitable for context.
     
     Args:
-        events_df: DataFrame containing retrieved events with columns:
-                   ['event', 'label', 'date', 'abstract']
+        doc_indices: Row positions of the retrieved events, best match first
     
     Returns:
         Formatted string with document information
     """
-    formatted_documents = "### Retrieved Documents:\n"
-    for idx, row in events_df.iterrows():
-        formatted_documents += f"""
-Document {idx + 1}:
-- **Event:** {row['event']}
-- **Label:** {row['label']}
-- **Date:** {row['date']}
-- **Abstract:** {row['abstract']}
-
-"""
-    return formatted_documents
+    # One template fill per document, written straight into a single buffer,
+    # instead of a temporary string for every concatenation step
+    buffer = io.StringIO()
+    buffer.write("### Retrieved Documents:\n")
+    for rank, (event, label, date, abstract) in enumerate(zip(
+        EVENTS[doc_indices], LABELS[doc_indices], DATES[doc_indices], ABSTRACTS[doc_indices]
+    ), start=1):
+        buffer.write(_DOCUMENT_TEMPLATE.format_map({
+            'rank': rank, 'event': event, 'label': label, 'date': date, 'abstract': abstract
+        }))
+    return buffer.getvalue()
 
 
 def retrieve_events(query: str, k: int = 5) -> pd.DataFrame:
@@ -85,50 +674,162 @@ def retrieve_events(query: str, k: int = 5) -> pd.DataFrame:
     Returns:
         DataFrame with top-k most relevant events
     
+    Raises:
+        ValueError: If query is empty or k is invalid
+    """
+    doc_indices = retrieve_event_indices(query, k=k)
+    return DF.iloc[doc_indices]
+
+
+def retrieve_event_indices(query: str, k: int = 5) -> np.ndarray:
+    """
+    Retrieve the row positions of the top-k most relevant events.
+    
+    Same as retrieve_events() without materializing a DataFrame, for the
+    RAG hot path.
+    
+    Args:
+        query: User's search query
+        k: Number of documents to retrieve (default: 5)
+    
+    Returns:
+        Integer array of DF row positions, best match first
+    
     Raises:
         ValueError: If query is empty or k is invalid
     """
     if not query or not query.strip():
         raise ValueError("Query cannot be empty")
     
+    load_resources()
     if k < 1 or k > len(DF):
         raise ValueError(f"k must be between 1 and {len(DF)}")
     
-    # Encode query and ensure float32 dtype
-    query_embedding = MODEL.encode([query])
-    query_embedding = np.array(query_embedding, dtype='float32')
+    query_embedding = embed_query(query)
+    distances, indices = search(query_embedding, k=k)
     
-    # Verify dtype
-    assert query_embedding.dtype == np.float32, "Query embedding must be float32"
+    logger.debug(f"Retrieved {k} documents for query: '{query[:50]}...'")
+    logger.debug(f"Similarities: {distances[0]}")
     
-    # Search FAISS index
-    distances, indices = INDEX.search(query_embedding, k=k)
+    return indices[0]
+
+
+def retrieve_events_batch(queries: List[str], k: int = 5) -> List[pd.DataFrame]:
+    """
+    Retrieve top-k events for several queries with one encoder forward pass
+    and one index search over the whole (Q, d) query matrix.
     
-    logger.info(f"Retrieved {k} documents for query: '{query[:50]}...'")
-    logger.debug(f"Distances: {distances[0]}")
+    Args:
+        queries: User search queries
+        k: Number of documents to retrieve per query (default: 5)
+    
+    Returns:
+        One DataFrame of top-k events per query, in input order
     
-    return DF.iloc[indices[0]]
+    Raises:
+        ValueError: If a query is empty or k is invalid
+    """
+    all_indices = retrieve_event_indices_batch(queries, k=k)
+    return [DF.iloc[row] for row in all_indices]
 
 
-def generate_answer(prompt: str, retrieved_docs: pd.DataFrame, use_openai: bool = False) -> str:
+def retrieve_event_indices_batch(queries: List[str], k: int = 5) -> np.ndarray:
     """
-    Generate answer using either OpenAI or local Ollama model.
+    Batched retrieve_event_indices(): row positions of the top-k events for
+    several queries, without materializing DataFrames.
     
     Args:
-        prompt: User's question
-        retrieved_docs: DataFrame with retrieved context documents
-        use_openai: If True, use OpenAI GPT-4; otherwise use Ollama
+        queries: User search queries
+        k: Number of documents to retrieve per query (default: 5)
     
     Returns:
-        HTML-formatted answer string
+        Integer array of shape (len(queries), k), best match first per row
     
     Raises:
-        RuntimeError: If model fails to generate response
+        ValueError: If a query is empty or k is invalid
     """
-    global client
-    context = format_retrieved_documents(retrieved_docs)
+    if any(not query or not query.strip() for query in queries):
+        raise ValueError("Query cannot be empty")
+    
+    load_resources()
+    if k < 1 or k > len(DF):
+        raise ValueError(f"k must be between 1 and {len(DF)}")
+    
+    if not queries:
+        return np.empty((0, k), dtype=np.int64)
+    
+    query_embeddings = np.ascontiguousarray(
+        QUERY_MODEL.encode(queries, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True),
+        dtype=np.float32
+    )
+    distances, indices = search(query_embeddings, k=k)
     
-    system_prompt = """
+    logger.debug(f"Retrieved {k} documents for each of {len(queries)} queries")
+    
+    return indices
+
+
+def search(query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k search for a (Q, d) matrix of normalized query embeddings on the
+    fastest available backend.
+    
+    Returns:
+        Tuple of (similarities, indices), each of shape (Q, k)
+    """
+    if SEARCH_BACKEND == "gpu":
+        return GPU_INDEX.search(query_embeddings, k=k)
+    if SEARCH_BACKEND == "exact":
+        return exact_search(query_embeddings, k=k)
+    return INDEX.search(query_embeddings, k=k)
+
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def embed_query(query: str) -> np.ndarray:
+    """
+    Encode a query into a normalized float32 embedding of shape (1, d).
+    
+    Results are cached, so the returned array is shared and must not be
+    modified in place.
+    """
+    # Encode query to a unit vector and ensure float32 dtype
+    query_embedding = np.ascontiguousarray(get_query_model().encode([query], normalize_embeddings=True), dtype=np.float32)
+    
+    # Verify dtype
+    assert query_embedding.dtype == np.float32, "Query embedding must be float32"
+    
+    return query_embedding
+
+
+def exact_search(query_embedding: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k search over EVENT_EMBEDDINGS.
+    
+    Uses SimSIMD distance kernels when installed, otherwise a single
+    BLAS-backed matrix product.
+    
+    Args:
+        query_embedding: float32 array of shape (Q, d)
+        k: Number of neighbours to return per query
+    
+    Returns:
+        Tuple of (similarities, indices), each of shape (Q, k), like INDEX.search
+    """
+    # Both sides are unit vectors, so the dot product is the cosine similarity
+    if simsimd is not None:
+        similarities = np.asarray(simsimd.cdist(query_embedding, EVENT_EMBEDDINGS, metric="dot"))
+    else:
+        similarities = query_embedding @ EVENT_EMBEDDINGS.T
+    
+    # Partial selection is O(N) per query, only the k winners get sorted
+    top_k = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_similarities = np.take_along_axis(similarities, top_k, axis=1)
+    order = np.argsort(-top_similarities, axis=1)
+    
+    return np.take_along_axis(top_similarities, order, axis=1), np.take_along_axis(top_k, order, axis=1)
+
+
+SYSTEM_PROMPT = """
 You are a highly knowledgeable assistant that answers questions based only on the provided context.
 Do not introduce external information or speculate. Use the context strictly to construct your response.
 If the context is insufficient to answer, respond by stating that explicitly.
@@ -150,6 +851,20 @@ Example of INCORRECT response (DO NOT DO THIS):
 ```
 """
 
+
+def build_messages(prompt: str, doc_indices: np.ndarray) -> List[Dict[str, str]]:
+    """
+    Build the chat messages (system prompt + context and question) for the LLM.
+    
+    Args:
+        prompt: User's question
+        doc_indices: Row positions of the retrieved context documents
+    
+    Returns:
+        List of role/content message dicts accepted by both Ollama and OpenAI
+    """
+    context = format_retrieved_documents(doc_indices)
+    
     user_message = f"""
 ### Context:
 {context}
@@ -161,56 +876,215 @@ Example of INCORRECT response (DO NOT DO THIS):
 Answer the question based on the context provided. Return your response as raw HTML content only.
 Remember: No markdown, no code blocks, no prefix text - just pure HTML starting with a tag.
 """
+    
+    return [
+        {'role': 'system', 'content': SYSTEM_PROMPT},
+        {'role': 'user', 'content': user_message},
+    ]
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Return the shared OpenAI client, creating it on first use.
+    
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+    """
+    global client
+    if client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            logger.error("Cannot use OpenAI: OPENAI_API_KEY environment variable is not set.")
+            # We raise an error here so the user gets a proper 500 response
+            raise ValueError("Cannot use OpenAI: OPENAI_API_KEY environment variable is not set.")
+        
+        logger.info("Initializing OpenAI client...")
+        client = create_openai_client(api_key)
+    return client
+
+
+def stream_ollama_answer(messages: List[Dict[str, str]]) -> Iterator[str]:
+    """
+    Stream an Ollama answer without tying up its endpoint while the caller reads.
+    
+    A background thread drains the Ollama stream into a queue and releases the
+    endpoint slot as soon as generation ends, so a slow client reading the
+    streamed response never keeps an endpoint idle. Closing this generator
+    early stops the thread at the next chunk.
+    
+    Args:
+        messages: Chat messages built by build_messages()
+    
+    Yields:
+        Raw text chunks of the answer
+    """
+    chunks: "queue.Queue[object]" = queue.Queue()
+    stop = threading.Event()
+    
+    def drain():
+        try:
+            with OLLAMA_POOL.client() as ollama_client:
+                # think=False: reasoning-capable models would otherwise spend the
+                # stream on hidden thinking tokens and can return empty content
+                for chunk in ollama_client.chat(model=OLLAMA_MODEL, messages=messages, stream=True, think=False):
+                    if stop.is_set():
+                        break
+                    if chunk.message.content:
+                        chunks.put(chunk.message.content)
+            chunks.put(None)
+        except Exception as e:
+            chunks.put(e)
+    
+    threading.Thread(target=drain, daemon=True).start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def generate_answer(prompt: str, doc_indices: np.ndarray, use_openai: bool = False) -> str:
+    """
+    Generate answer using either OpenAI or local Ollama model.
+    
+    Collects the chunks of stream_answer(), so blocking and streaming
+    callers go through the same LLM calls.
+    
+    Args:
+        prompt: User's question
+        doc_indices: Row positions of the retrieved context documents
+        use_openai: If True, use OpenAI GPT-4; otherwise use Ollama
+    
+    Returns:
+        HTML-formatted answer string
+    
+    Raises:
+        RuntimeError: If model fails to generate response
+    """
+    return "".join(stream_answer(prompt, doc_indices, use_openai))
+
+
+def stream_answer(prompt: str, doc_indices: np.ndarray, use_openai: bool = False) -> Iterator[str]:
+    """
+    Stream the answer from OpenAI or Ollama as it is generated.
+    
+    Text chunks are yielded as soon as the model produces them, so the first
+    words reach the user after prompt evaluation instead of after the whole
+    generation.
+    
+    Args:
+        prompt: User's question
+        doc_indices: Row positions of the retrieved context documents
+        use_openai: If True, use OpenAI GPT-4; otherwise use Ollama
+    
+    Yields:
+        Raw text chunks of the HTML answer
+    
+    Raises:
+        RuntimeError: If model fails to generate response
+    """
+    messages = build_messages(prompt, doc_indices)
 
     try:
         if use_openai:
-            if client is None:
-                api_key = os.getenv("OPENAI_API_KEY")
-                if not api_key:
-                    logger.error("Cannot use OpenAI: OPENAI_API_KEY environment variable is not set.")
-                    # We raise an error here so the user gets a proper 500 response
-                    raise ValueError("Cannot use OpenAI: OPENAI_API_KEY environment variable is not set.")
-                
-                logger.info("Initializing OpenAI client...")
-                client = OpenAI(api_key=api_key)
-            
-            logger.info("Generating answer with OpenAI GPT-4...")
-            response = client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+            logger.debug("Streaming answer with OpenAI GPT-4...")
+            stream = get_openai_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7,
+                stream=True
             )
-            answer = response.choices[0].message.content
-            logger.info("✓ OpenAI response generated successfully")
-            return answer
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
         else:
-            logger.info("Generating answer with Ollama (phi3:mini)...")
-            response: ChatResponse = chat(
-                model='phi3:mini',
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': system_prompt,
-                    },
-                    {
-                        'role': 'user',
-                        'content': user_message,
-                    },
-                ]
-            )
-            answer = response.message.content
-            logger.info("✓ Ollama response generated successfully")
-            return answer
+            logger.debug(f"Streaming answer with Ollama ({OLLAMA_MODEL})...")
+            yield from stream_ollama_answer(messages)
+        
+        logger.debug("✓ Streamed response completed successfully")
             
     except Exception as e:
         logger.error(f"Error generating answer: {e}")
         raise RuntimeError(f"Failed to generate answer: {str(e)}")
 
 
+# ===== ANSWER CACHE =====
+_ANSWER_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_ANSWER_CACHE_LOCK = threading.Lock()
+# Opened on first use, like the model and index, so importing stays side-effect free
+_ANSWER_DISK_CACHE: Optional[diskcache.Cache] = None
+
+# Generations currently running, so identical concurrent requests share one LLM call
+_IN_FLIGHT: Dict[tuple, Future] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def _get_answer_disk_cache() -> diskcache.Cache:
+    """Return the on-disk answer cache, opening it on first call."""
+    global _ANSWER_DISK_CACHE
+    if _ANSWER_DISK_CACHE is not None:
+        return _ANSWER_DISK_CACHE
+    
+    with _LOAD_LOCK:
+        if _ANSWER_DISK_CACHE is None:
+            _ANSWER_DISK_CACHE = diskcache.Cache(ANSWER_DISK_CACHE_DIR, size_limit=ANSWER_DISK_CACHE_SIZE_LIMIT)
+        return _ANSWER_DISK_CACHE
+
+
+def _disk_cache_key(key: tuple) -> str:
+    """
+    Digest of an answer cache key, scoped to the current corpus/index
+    (CACHE_KEY), LLM and system prompt, so answers produced by another
+    retrieval setup, model or prompt are never reused after a restart.
+    """
+    prompt, use_openai, k = key
+    get_data()
+    llm = OPENAI_MODEL if use_openai else OLLAMA_MODEL
+    return hashlib.blake2b(f"{CACHE_KEY}|{llm}|{SYSTEM_PROMPT}|{prompt}|{k}".encode()).hexdigest()
+
+
+def _remember_answer(key: tuple, answer: str):
+    """Store an answer in memory, evicting the least recently used one when full."""
+    with _ANSWER_CACHE_LOCK:
+        _ANSWER_CACHE[key] = answer
+        _ANSWER_CACHE.move_to_end(key)
+        if len(_ANSWER_CACHE) > ANSWER_CACHE_SIZE:
+            _ANSWER_CACHE.popitem(last=False)
+
+
+def _get_cached_answer(key: tuple) -> Optional[str]:
+    """Return the cached answer for key from memory, falling back to disk."""
+    with _ANSWER_CACHE_LOCK:
+        answer = _ANSWER_CACHE.get(key)
+        if answer is not None:
+            _ANSWER_CACHE.move_to_end(key)
+            return answer
+    
+    answer = _get_answer_disk_cache().get(_disk_cache_key(key))
+    if answer is not None:
+        _remember_answer(key, answer)
+    return answer
+
+
+def _cache_answer(key: tuple, answer: str):
+    """
+    Store an answer in both the memory and the disk cache. Blank answers
+    (e.g. a model that spent its output on hidden reasoning) are not
+    cached, so the next request asks the LLM again.
+    """
+    if not answer.strip():
+        logger.warning("Not caching a blank answer")
+        return
+    _remember_answer(key, answer)
+    _get_answer_disk_cache().set(_disk_cache_key(key), answer, expire=ANSWER_DISK_CACHE_EXPIRE_SECONDS)
+
+
 def rag(prompt: str, use_openai: bool = False, k: int = 5) -> str:
     """
     Perform Retrieval-Augmented Generation (RAG) on historical events.
@@ -239,23 +1113,141 @@ def rag(prompt: str, use_openai: bool = False, k: int = 5) -> str:
     if not prompt or not prompt.strip():
         raise ValueError("Prompt cannot be empty")
     
-    logger.info(f"RAG query: '{prompt[:100]}...' (use_openai={use_openai})")
+    logger.debug(f"RAG query: '{prompt[:100]}...' (use_openai={use_openai})")
+    
+    cache_key = (prompt.strip().lower(), use_openai, k)
+    answer = _get_cached_answer(cache_key)
+    if answer is not None:
+        logger.debug("✓ Answer served from cache")
+        return answer
+    
+    # Only the first of several concurrent identical requests runs the pipeline,
+    # the others wait for its result instead of queueing their own LLM call
+    with _IN_FLIGHT_LOCK:
+        future = _IN_FLIGHT.get(cache_key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _IN_FLIGHT[cache_key] = future
+    
+    if not is_leader:
+        logger.info("Waiting for in-flight generation of the same query")
+        try:
+            return future.result(timeout=IN_FLIGHT_WAIT_SECONDS)
+        except FutureTimeoutError:
+            raise RuntimeError("Timed out waiting for the in-flight generation of the same query")
     
     try:
-        # Step 1: Retrieve relevant documents
-        docs = retrieve_events(prompt, k=k)
-        
-        # Step 2: Generate answer
-        answer = generate_answer(prompt, docs, use_openai)
-        
-        logger.info("✓ RAG pipeline completed successfully")
+        # A previous leader may have finished between the cache miss above and
+        # this request taking over; its answer is cached by then
+        answer = _get_cached_answer(cache_key)
+        if answer is None:
+            # Step 1: Retrieve relevant documents
+            docs = retrieve_event_indices(prompt, k=k)
+            
+            # Step 2: Generate answer
+            answer = generate_answer(prompt, docs, use_openai)
+            
+            _cache_answer(cache_key, answer)
+        future.set_result(answer)
+        logger.debug("✓ RAG pipeline completed successfully")
         return answer
         
     except Exception as e:
         logger.error(f"RAG pipeline failed: {e}")
+        future.set_exception(e)
+        raise
+    
+    finally:
+        if not future.done():
+            # Interrupted by a BaseException (e.g. shutdown): do not leave waiters hanging
+            future.set_exception(RuntimeError("Generation of the same query was interrupted"))
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT.pop(cache_key, None)
+
+
+def rag_stream(prompt: str, use_openai: bool = False, k: int = 5) -> Iterator[str]:
+    """
+    Streaming variant of rag(): yields the answer in chunks as it is generated.
+    
+    Cached answers are yielded as a single chunk, and a fully streamed answer
+    is added to the same cache rag() uses. Unlike rag(), concurrent identical
+    streams are not coalesced: each one streams its own generation, since
+    its chunks go to a single client as they arrive.
+    
+    Args:
+        prompt: User's question about historical events
+        use_openai: If True, use OpenAI GPT-4; if False, use local Ollama (default: False)
+        k: Number of documents to retrieve for context (default: 5)
+    
+    Yields:
+        Raw text chunks of the HTML answer
+    
+    Raises:
+        ValueError: If prompt is empty
+        RuntimeError: If retrieval or generation fails
+    """
+    if not prompt or not prompt.strip():
+        raise ValueError("Prompt cannot be empty")
+    
+    logger.debug(f"RAG stream query: '{prompt[:100]}...' (use_openai={use_openai})")
+    
+    cache_key = (prompt.strip().lower(), use_openai, k)
+    answer = _get_cached_answer(cache_key)
+    if answer is not None:
+        logger.debug("✓ Answer served from cache")
+        yield answer
+        return
+    
+    try:
+        docs = retrieve_event_indices(prompt, k=k)
+        
+        chunks = []
+        for chunk in stream_answer(prompt, docs, use_openai):
+            chunks.append(chunk)
+            yield chunk
+        
+        _cache_answer(cache_key, "".join(chunks))
+        logger.debug("✓ RAG stream completed successfully")
+        
+    except Exception as e:
+        logger.error(f"RAG stream failed: {e}")
         raise
 
 
+def _preload_ollama_model(endpoint: OllamaEndpoint):
+    """Ask one Ollama endpoint to load phi3:mini into memory."""
+    try:
+        # An empty prompt makes Ollama load the model without generating
+        endpoint.client.generate(model=OLLAMA_MODEL, prompt='')
+        logger.info(f"✓ {OLLAMA_MODEL} loaded on {endpoint.url}")
+    except Exception as e:
+        logger.warning(f"Could not preload Ollama model on {endpoint.url}: {e}")
+
+
+def warmup(load_llm: bool = True):
+    """
+    Run one dummy query through the pipeline so the first real request does
+    not pay for lazy initialisation (thread pools, kernels, ONNX session).
+    
+    Args:
+        load_llm: Also ask every Ollama endpoint, in background threads, to load
+            phi3:mini into memory
+    """
+    load_resources()
+    
+    logger.info("Warming up query encoder and index...")
+    query_embedding = np.ascontiguousarray(QUERY_MODEL.encode(["warmup"], normalize_embeddings=True), dtype=np.float32)
+    search(query_embedding, k=1)
+    
+    if load_llm:
+        # In the background, so a slow or unreachable endpoint cannot stall startup
+        for endpoint in OLLAMA_POOL.endpoints:
+            threading.Thread(target=_preload_ollama_model, args=(endpoint,), daemon=True).start()
+    
+    logger.info("✓ Warmup complete")
+
+
 # ===== OPTIONAL: EVALUATION FUNCTION =====
 def evaluate_retrieval(query: str, expected_keywords: list, k: int = 5) -> dict:
     """
@@ -269,32 +1261,57 @@ def evaluate_retrieval(query: str, expected_keywords: list, k: int = 5) -> dict:
     Returns:
         Dictionary with evaluation metrics
     """
-    docs = retrieve_events(query, k=k)
+    return evaluate_retrieval_batch([(query, expected_keywords)], k=k)[0]
+
+
+def evaluate_retrieval_batch(cases: List[Tuple[str, list]], k: int = 5) -> List[dict]:
+    """
+    Evaluate retrieval quality for several queries with a single batched search.
     
-    # Check how many expected keywords appear in retrieved docs
-    all_text = " ".join(docs['combined_text'].tolist()).lower()
-    found_keywords = [kw for kw in expected_keywords if kw.lower() in all_text]
+    Args:
+        cases: (query, expected_keywords) pairs
+        k: Number of documents to retrieve per query
     
-    return {
-        'query': query,
-        'retrieved_docs': len(docs),
-        'expected_keywords': expected_keywords,
-        'found_keywords': found_keywords,
-        'precision': len(found_keywords) / len(expected_keywords) if expected_keywords else 0
-    }
+    Returns:
+        One dictionary of evaluation metrics per case, in input order
+    """
+    all_indices = retrieve_event_indices_batch([query for query, _ in cases], k=k)
+    
+    results = []
+    for (query, expected_keywords), doc_indices in zip(cases, all_indices):
+        # Check how many expected keywords appear in retrieved docs
+        all_text = " ".join(COMBINED_LOWER[doc_indices])
+        found_keywords = [kw for kw in expected_keywords if kw.lower() in all_text]
+        
+        results.append({
+            'query': query,
+            'retrieved_docs': len(doc_indices),
+            'expected_keywords': expected_keywords,
+            'found_keywords': found_keywords,
+            'precision': len(found_keywords) / len(expected_keywords) if expected_keywords else 0
+        })
+    return results
 
 
 # ===== OPTIONAL: SAVE/LOAD INDEX =====
-def save_index(path: str = "faiss_index.bin"):
-    """Save FAISS index to disk for faster startup."""
-    faiss.write_index(INDEX, path)
+def save_index(path: Optional[str] = None):
+    """Save FAISS index to disk for faster startup (default: the cache file)."""
+    index = get_index()
+    if index is None:
+        logger.info("Queries use exact search, there is no FAISS index to save")
+        return
+    path = path or INDEX_PATH
+    write_atomically(path, lambda tmp_path: faiss.write_index(index, tmp_path))
     logger.info(f"✓ FAISS index saved to {path}")
 
 
-def load_index(path: str = "faiss_index.bin") -> Optional[faiss.Index]:
-    """Load FAISS index from disk."""
+def load_index(path: Optional[str] = None) -> Optional[faiss.Index]:
+    """Load FAISS index from disk (default: the cache file)."""
+    if path is None:
+        get_data()
+        path = INDEX_PATH
     if os.path.exists(path):
-        index = faiss.read_index(path)
+        index = read_index(path)
         logger.info(f"✓ FAISS index loaded from {path}")
         return index
     return None